@@ -2,433 +2,107 @@
 import matplotlib as mpl
 mpl.use('agg')
 from matplotlib.testing.compare import compare_images
-from tempfile import NamedTemporaryFile
 import os.path
+import re
+import pytest
 import pygenometracks.plotTracks
 
 ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                     "test_data")
 
-browser_tracks = """
-[x-axis]
-where = top
-title = where=top
 
-[spacer]
-height = 0.05
+def _copy_ini(tmp_path_factory, file_name):
+    with open(os.path.join(ROOT, file_name), 'r') as fh:
+        text = fh.read()
+    ini_file = tmp_path_factory.mktemp("pyGenomeTracks_test") / file_name
+    # The data files live in ROOT, not next to the temporary ini
+    ini_file.write_text(re.sub(r'^file\s*=\s*',
+                               lambda m: f'file = {ROOT}{os.sep}', text,
+                               flags=re.MULTILINE))
+    return ini_file
 
-[tads]
-file = tad_classification.bed
-title = TADs color = bed_rgb; border_color = black
-file_type = domains
-border_color = black
-color = bed_rgb
-height = 5
 
-[tads 2]
-file = tad_classification.bed
-title = TADs orientation = inverted; color = #cccccc; border_color = red
-file_type = domains
-border_color = red
-color = #cccccc
-orientation = inverted
-height = 3
+@pytest.fixture(scope='session')
+def browser_ini(tmp_path_factory):
+    return _copy_ini(tmp_path_factory, "browser_tracks.ini")
 
-[spacer]
-height = 0.5
 
-[tad state]
-file = chromatinStates_kc.bed.gz
-height = 1.2
-title = bed display = interleaved; labels = false
-display = interleaved
-labels = false
+@pytest.fixture(scope='session')
+def empty_ini(tmp_path_factory):
+    return _copy_ini(tmp_path_factory, "empty.ini")
 
-[spacer]
-height = 0.5
 
-[tad state]
-file = chromatinStates_kc.bed.gz
-height = 0.5
-title = bed display = collapsed; color = bed_rgb
-labels = false
-color = bed_rgb
-display = collapsed
+@pytest.fixture(scope='session')
+def first_track_overlay_ini(tmp_path_factory):
+    return _copy_ini(tmp_path_factory, "firstTrackOverlay.ini")
 
-[spacer]
-height = 0.5
 
-[test bedgraph]
-file = bedgraph_chrx_2e6_5e6.bg
-color = blue
-height = 1.5
-title = bedgraph color = blue
-max_value = 100
+@pytest.fixture(scope='session')
+def ylims_ini(tmp_path_factory):
+    return _copy_ini(tmp_path_factory, "ylims.ini")
 
-[test arcs]
-file = test.arcs
-title = links orientation = inverted
-orientation = inverted
-line_style = dashed
-height = 2
 
-[test bigwig]
-file = bigwig2_X_2.5e6_3.5e6.bw
-color = blue
-height = 1.5
-title = bigwig number_of_bins = 2000
-number_of_bins = 2000
+@pytest.fixture(scope='session')
+def render(tmp_path_factory):
+    """
+    Return a function plotting an ini file on a region with the
+    common options of this module. Plots are cached for the session
+    so identical (ini, region, extra args) are only rendered once.
+    """
+    cache = {}
+    out_dir = tmp_path_factory.mktemp("pyGenomeTracks_out")
 
-[spacer]
+    def _render(ini_file, region, extra_args=()):
+        key = (str(ini_file), region, tuple(extra_args))
+        if key not in cache:
+            outfile = out_dir / f"pyGenomeTracks_test_{len(cache)}.png"
+            args = f"--tracks {ini_file} --region {region} "\
+                   "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
+                   f"--outFileName {outfile}".split() + list(extra_args)
+            pygenometracks.plotTracks.main(args)
+            cache[key] = str(outfile)
+        return cache[key]
 
-[test bigwig overlay]
-file = bigwig2_X_2.5e6_3.5e6.bw
-color = red
-title = color:red; max_value = 50; number_of_bins = 100 (next track: overlay_previous = yes; max_value = 50; show_data_range = false; color = #0000FF80 (blue, with alpha 0.5))
-min_value = 0
-max_value = 50
-height = 2
-number_of_bins = 100
+    return _render
 
-[test bigwig overlay]
-file = bigwig_chrx_2e6_5e6.bw
-color = #0000FF80
-title =
-min_value = 0
-max_value = 50
-show_data_range = false
-overlay_previous = yes
-number_of_bins = 100
-
-[spacer]
-height = 1
-
-[tads 3]
-file = tad_classification.bed
-title = TADs color = #cccccc; border_color = red (next track: overlay_previous = share-y links_type = loops)
-file_type = domains
-border_color = red
-color = #cccccc
-height = 3
-
-[test arcs overlay]
-file = test.arcs
-color = red
-line_width = 10
-links_type = loops
-overlay_previous = share-y
-
-[test arcs]
-file = test.arcs
-line_width = 3
-color = RdYlGn
-title = links line_width = 3 color RdYlGn
-height = 3
-
-[spacer]
-height = 0.5
-title = height = 0.5
-
-[genes 2]
-file = dm3_genes.bed.gz
-height = 7
-title = genes (bed12) style = flybase;fontsize = 10
-style = flybase
-fontsize = 10
-
-[spacer]
-height = 1
-
-[test gene rows]
-file = dm3_genes.bed.gz
-height = 3
-title = gene_rows = 3 (maximum 3 rows); style = UCSC
-fontsize = 8
-style = UCSC
-gene_rows = 3
-
-[spacer]
-height = 1
-
-[test bed6]
-file = dm3_genes.bed6.gz
-height = 7
-title = bed6 border_color = black; gene_rows = 10; fontsize = 7; color = Reds (when a color map is used for the color (e.g. coolwarm, Reds) the bed score column mapped to a color)
-fontsize = 7
-file_type = bed
-color = Reds
-border_color = black
-gene_rows = 10
-
-[test bed6]
-file = dm3_genes.bed6.gz
-height = 10
-title = bed6 fontsize = 10; line_width = 1.5; global_max_row = true (global_max_row sets the number of genes per row as the maximum found anywhere in the genome, hence the white space at the bottom)
-fontsize = 10
-file_type = bed
-global_max_row = true
-line_width = 1.5
-
-[x-axis]
-fontsize = 30
-title = fontsize = 30
-
-[vlines]
-file = tad_classification.bed
-type = vlines
-
-"""
-with open(os.path.join(ROOT, "browser_tracks.ini"), 'w') as fh:
-    fh.write(browser_tracks)
-
-
-browser_tracks = """
-[x-axis]
-
-[bed]
-title = empty bed
-file = empty.bed
-
-[gtf]
-title = empty gtf
-file = empty.gtf
-
-[tad]
-title = empty domains
-file = empty.bed
-file_type = domains
-
-[bedgraph]
-title = empty bedgraph
-file = empty.bedgraph
-min_value = -10
-max_value = 100
-
-[narrowPeak]
-title = empty narrowPeak
-file = empty.narrowPeak
-
-[bedgraph_matrix]
-title = empty bedgraph_matrix
-file = empty.bm
-file_type = bedgraph_matrix
-
-[links]
-title = empty links
-file = empty.links
-"""
-with open(os.path.join(ROOT, "empty.ini"), 'w') as fh:
-    fh.write(browser_tracks)
-
-browser_tracks = """
-[bed]
-file = empty.bed
-overlay_previous = yes
-"""
-with open(os.path.join(ROOT, "firstTrackOverlay.ini"), 'w') as fh:
-    fh.write(browser_tracks)
-
-browser_tracks = """
-[hlines1]
-y_values = 0.1
-min_value = 0
-max_value = 0.15
-file_type = hlines
-height = 3
-title = y_values = 0.1, min_value = 0, max_value = 0.15
-
-[spacer]
-
-[hlines1]
-y_values = 0.01
-min_value = 0
-max_value = 0.03
-file_type = hlines
-height = 3
-title = y_values = 0.01, min_value = 0, max_value = 0.03
-
-[spacer]
-
-[hlines1]
-y_values = 10
-min_value = 0
-max_value = 12.023
-file_type = hlines
-height = 3
-title = y_values = 10, min_value = 0, max_value = 12.023
-
-[spacer]
-
-[hlines1]
-y_values = 0.000001
-min_value = 0
-max_value = 0.0000033489201
-file_type = hlines
-height = 3
-title = y_values = 0.000001, min_value = 0, max_value = 0.0000033489201
-
-[spacer]
-
-[hlines1]
-y_values = 1000000000
-min_value = 0
-max_value = 2342000300
-file_type = hlines
-height = 3
-title = y_values = 1000000000, min_value = 0, max_value = 2342000300
-
-[spacer]
-
-[hlines1]
-y_values = -0.000001
-min_value = -0.000003
-max_value = 0
-file_type = hlines
-height = 3
-title = y_values = -0.000001, min_value = -0.000003, max_value = 0
-[spacer]
-
-[hlines1]
-y_values = -30000000000
-min_value = -34000000000
-max_value = 0
-file_type = hlines
-height = 3
-title = y_values = -30000000000, min_value = 0, max_value = -34000000000
-"""
-
-with open(os.path.join(ROOT, "ylims.ini"), 'w') as fh:
-    fh.write(browser_tracks)
 
 tolerance = 13  # default matplotlib pixed difference tolerance
-
-
-def test_plot_tracks():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "browser_tracks.ini")
-    region = "X:3000000-3500000"
-    expected_file = os.path.join(ROOT, 'master_plot.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_plot_tracks_empty_files():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "empty.ini")
-    region = "X:3000000-3500000"
-    expected_file = os.path.join(ROOT, 'master_empty.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
+if mpl.__version__ == "3.1.1":
+    missing_chr_tolerance = 16
+else:
+    missing_chr_tolerance = tolerance
+
+params = [
+    pytest.param("browser_ini", "X:3000000-3500000", [],
+                 'master_plot.png', tolerance,
+                 id="plot_tracks"),
+    pytest.param("empty_ini", "X:3000000-3500000", [],
+                 'master_empty.png', tolerance,
+                 id="plot_tracks_empty_files"),
+    pytest.param("first_track_overlay_ini", "X:3000000-3500000", [],
+                 'master_empty2.png', tolerance,
+                 id="first_track_overlay"),
+    pytest.param("browser_ini", "X:0-1000000", [],
+                 'master_plot_2.png', tolerance,
+                 id="plot_tracks_existing_chr_empty_tracks"),
+    pytest.param("browser_ini", "Y:0-1000000", [],
+                 'master_plot_3.png', missing_chr_tolerance,
+                 id="plot_tracks_missing_chr"),
+    pytest.param("browser_ini", "X:3000000-3500000", ["--decreasingXAxis"],
+                 'master_plot_dec.png', tolerance,
+                 id="plot_tracks_dec"),
+    pytest.param("ylims_ini", "X:0-221", [],
+                 'master_ylims.png', tolerance,
+                 id="plot_ylims"),
+]
+
+
+@pytest.mark.parametrize('ini_fixture, region, extra_args, expected, '
+                         'my_tolerance', params)
+def test_plot_tracks(request, render, ini_fixture, region, extra_args,
+                     expected, my_tolerance):
+    ini_file = request.getfixturevalue(ini_fixture)
+    outfile = render(ini_file, region, extra_args)
+    expected_file = os.path.join(ROOT, expected)
+    res = compare_images(expected_file, outfile, my_tolerance)
     assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_first_track_overlay():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "firstTrackOverlay.ini")
-    region = "X:3000000-3500000"
-    expected_file = os.path.join(ROOT, 'master_empty2.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_plot_tracks_existing_chr_empty_tracks():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "browser_tracks.ini")
-    region = "X:0-1000000"
-    expected_file = os.path.join(ROOT, 'master_plot_2.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_plot_tracks_missing_chr():
-    if mpl.__version__ == "3.1.1":
-        my_tolerance = 16
-    else:
-        my_tolerance = tolerance
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "browser_tracks.ini")
-    region = "Y:0-1000000"
-    expected_file = os.path.join(ROOT, 'master_plot_3.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, my_tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_plot_tracks_dec():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "browser_tracks.ini")
-    region = "X:3000000-3500000"
-    expected_file = os.path.join(ROOT, 'master_plot_dec.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           "--decreasingXAxis "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)
-
-
-def test_plot_ylims():
-
-    outfile = NamedTemporaryFile(suffix='.png', prefix='pyGenomeTracks_test_',
-                                 delete=False)
-    ini_file = os.path.join(ROOT, "ylims.ini")
-    region = "X:0-221"
-    expected_file = os.path.join(ROOT, 'master_ylims.png')
-    args = f"--tracks {ini_file} --region {region} "\
-           "--trackLabelFraction 0.2 --width 38 --dpi 130 "\
-           f"--outFileName {outfile.name}".split()
-    pygenometracks.plotTracks.main(args)
-    res = compare_images(expected_file,
-                         outfile.name, tolerance)
-    assert res is None, res
-
-    os.remove(outfile.name)